@@ -1,7 +1,10 @@
-import json
+import asyncio
+import weakref
 from typing import Any, Dict, List
 import os
 
+import orjson
+
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import (
     HumanMessage,
@@ -29,22 +32,33 @@ Never call case_create without requester_id.
 5. After calling tools, summarize results clearly for the user.
 6. Only use available tools. Do not invent new ones.
 """
+_SYSTEM_MSG = SystemMessage(content=SYSTEM_PROMPT)
 
 
-def run_with_tools(user_text: str) -> Dict[str, Any]:
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
-        temperature=0.1,
-        api_key=os.getenv("GOOGLE_API_KEY")
-    ).bind_tools(TOOLS)
+# The chat model's async transport (an httpx AsyncClient) is bound to the loop that first used it, and
+# run_with_tools() starts a fresh loop per call; keep one bound model per loop, as tool.utils does for httpx.
+_LLMS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def _get_llm():
+    # Build the client and tool schemas once per event loop, not per request.
+    loop = asyncio.get_running_loop()
+    llm = _LLMS.get(loop)
+    if llm is None:
+        llm = ChatGoogleGenerativeAI(
+            model="gemini-2.0-flash",
+            temperature=0.1,
+            api_key=os.getenv("GOOGLE_API_KEY")
+        ).bind_tools(TOOLS)
+        _LLMS[loop] = llm
+    return llm
+
 
-    messages = [
-        SystemMessage(content=SYSTEM_PROMPT),
-        HumanMessage(content=user_text),
-    ]
+async def _run_conversation(llm, user_text: str) -> Dict[str, Any]:
+    messages = [_SYSTEM_MSG, HumanMessage(content=user_text)]
 
     for _ in range(5):
-        ai_msg = llm.invoke(messages)
+        ai_msg = await llm.ainvoke(messages)
 
         # 如果模型直接给出文本且没有 tool_calls
         if ai_msg.content and not ai_msg.tool_calls:
@@ -62,11 +76,11 @@ def run_with_tools(user_text: str) -> Dict[str, Any]:
                     raise RuntimeError(f"Unknown tool call: {tool_name}")
 
                 tool = TOOL_MAP[tool_name]
-                result = tool.invoke(tool_args)
+                result = await tool.ainvoke(tool_args)
 
                 messages.append(
                     ToolMessage(
-                        content=json.dumps(result, ensure_ascii=False),
+                        content=orjson.dumps(result).decode(),
                         tool_call_id=tc["id"],
                     )
                 )
@@ -78,6 +92,16 @@ def run_with_tools(user_text: str) -> Dict[str, Any]:
     return {"final_text": "(stopped: too many tool iterations)", "messages": messages}
 
 
+async def run_with_tools_batch(user_texts: List[str]) -> List[Dict[str, Any]]:
+    """Run independent prompts concurrently; the LLM round trips of all conversations overlap."""
+    llm = _get_llm()
+    return list(await asyncio.gather(*[_run_conversation(llm, t) for t in user_texts]))
+
+
+def run_with_tools(user_text: str) -> Dict[str, Any]:
+    return asyncio.run(run_with_tools_batch([user_text]))[0]
+
+
 if __name__ == "__main__":
     out = run_with_tools(
         "Create a case for XiaoMing, employee ID EMP2001, playload_json could be demotest"
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+from typing import List
+
+from pydantic import BaseModel
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from agent_without_rag import run_with_tools_batch
+
+
+class TurnResult(BaseModel):
+    index: int
+    answer: str
+
+
+class BatchResult(BaseModel):
+    results: List[TurnResult]
+
+
+_STRUCTURED_LLM = None
+
+
+def _get_structured_llm():
+    global _STRUCTURED_LLM
+    if _STRUCTURED_LLM is None:
+        llm = ChatGoogleGenerativeAI(
+            model="gemini-2.0-flash",
+            temperature=0.1,
+            api_key=os.getenv("GOOGLE_API_KEY"),
+        )
+        _STRUCTURED_LLM = llm.with_structured_output(BatchResult)
+    return _STRUCTURED_LLM
+
+
+def _format_group(prompts: List[str]) -> str:
+    questions = "\n\n".join(f"### Q{i}\n{p}" for i, p in enumerate(prompts, start=1))
+    return f"""
+You are an HR assistant answering {len(prompts)} independent questions.
+Answer each question on its own; never refer to another question or its answer.
+Return exactly one result per question, with index equal to the question number.
+
+{questions}
+"""
+
+
+def batch_run(prompts: List[str], k: int = 4) -> List[str]:
+    """
+    Answer stateless QA prompts by packing k of them into one Gemini call (row-marshaling).
+
+    Only for self-contained questions that need no tools; use batch_run_with_tools otherwise.
+    Larger k amortizes more round trips but grows the prompt; tune per model/quota.
+    """
+    groups = [prompts[i : i + k] for i in range(0, len(prompts), k)]
+    outputs = _get_structured_llm().batch([_format_group(g) for g in groups])
+
+    answers: List[str] = []
+    for group, out in zip(groups, outputs):
+        by_index = {r.index: r.answer for r in out.results}
+        answers.extend(by_index.get(i, "") for i in range(1, len(group) + 1))
+    return answers
+
+
+def batch_run_with_tools(prompts: List[str]) -> List[str]:
+    """Tool-calling turns cannot share one prompt; run them as concurrent conversations instead."""
+    return [out["final_text"] for out in asyncio.run(run_with_tools_batch(prompts))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts-file", required=True, help="One prompt per line.")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--with-tools", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.prompts_file, encoding="utf-8") as f:
+        prompts = [line.strip() for line in f if line.strip()]
+
+    if args.with_tools:
+        answers = batch_run_with_tools(prompts)
+    else:
+        answers = batch_run(prompts, k=args.k)
+
+    for prompt, answer in zip(prompts, answers):
+        print(json.dumps({"prompt": prompt, "answer": answer}, ensure_ascii=False))
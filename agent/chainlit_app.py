@@ -9,10 +9,16 @@ from typing import List
 
 import chainlit as cl
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
 
-from leave_agent_demo import TOOLS, build_graph, _append_log, _build_system_prompt, _normalize_user_turn
-from tool.tools import directory_lookup
+from leave_agent_demo import (
+    TOOLS,
+    build_graph,
+    SessionLogger,
+    _build_system_prompt,
+    _cached_directory_lookup,
+    _normalize_user_turn,
+)
 
 
 def _extract_policy_asset_elements(delta_messages: List[BaseMessage]) -> List[cl.Element]:
@@ -21,7 +27,7 @@ def _extract_policy_asset_elements(delta_messages: List[BaseMessage]) -> List[cl
 
     for m in delta_messages:
         if isinstance(m, AIMessage):
-            for tc in (m.tool_calls or []):
+            for tc in m.tool_calls:
                 call_id_to_name[str(tc.get("id"))] = str(tc.get("name"))
         elif isinstance(m, ToolMessage):
             tool_name = call_id_to_name.get(str(m.tool_call_id))
@@ -63,7 +69,7 @@ async def on_chat_start() -> None:
     sso_email = os.getenv("SSO_EMAIL", "nancyfu@company.com")
 
     try:
-        profile = directory_lookup.invoke({"lookup_by": "email", "value": sso_email})
+        profile = _cached_directory_lookup("email", sso_email)
     except Exception as e:
         await cl.Message(content=f"身份识别失败: {e}").send()
         return
@@ -71,23 +77,24 @@ async def on_chat_start() -> None:
     name = profile.get("employee_profile", {}).get("name", sso_email)
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     log_path = str(Path(__file__).resolve().parent / "logs" / f"web_session_{run_id}.md")
-    _append_log(log_path, "SESSION_START", f"sso_email={sso_email}")
+    logger = SessionLogger(log_path)
+    logger.log("SESSION_START", f"sso_email={sso_email}")
 
     llm = ChatGoogleGenerativeAI(
         model="gemini-2.0-flash",
         temperature=0.1,
         api_key=os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"),
     )
-    app = build_graph(llm.bind_tools(TOOLS), _build_system_prompt(profile), log_path)
+    app = build_graph(llm.bind_tools(TOOLS), _build_system_prompt(profile), logger)
 
     cl.user_session.set("app", app)
     cl.user_session.set("messages", [])
-    cl.user_session.set("log_path", log_path)
+    cl.user_session.set("logger", logger)
     cl.user_session.set(
         "policy_group",
         profile.get("employee_profile", {}).get("leave_policy_group", "FTE_CN_GZ"),
     )
-    _append_log(log_path, "SESSION_READY", f"name={name}, sso_email={sso_email}")
+    logger.log("SESSION_READY", f"name={name}, sso_email={sso_email}")
 
     await cl.Message(
         content=(
@@ -98,30 +105,50 @@ async def on_chat_start() -> None:
     ).send()
 
 
+@cl.on_chat_end
+async def on_chat_end() -> None:
+    logger: SessionLogger | None = cl.user_session.get("logger")
+    if logger is not None:
+        logger.log("SESSION_END", "")
+        logger.close()
+
+
 @cl.on_message
 async def on_message(message: cl.Message) -> None:
     app = cl.user_session.get("app")
     messages: List[BaseMessage] = cl.user_session.get("messages") or []
-    log_path: str = cl.user_session.get("log_path")
+    logger: SessionLogger = cl.user_session.get("logger")
 
     if app is None:
         await cl.Message(content="会话未初始化，请刷新页面重试。",).send()
         return
 
+    prev_len = len(messages)
     try:
-        _append_log(log_path, "USER", message.content)
+        logger.log("USER", message.content)
         normalized_text = _normalize_user_turn(messages, message.content)
-        _append_log(log_path, "USER_NORMALIZED", normalized_text)
-        _append_log(log_path, "APP_INVOKE_START", f"message_count_before={len(messages)}")
-
-        prev_len = len(messages)
-        messages = [*messages, HumanMessage(content=normalized_text)]
-
-        out = app.invoke({"messages": messages})
-        messages = out["messages"]
+        logger.log("USER_NORMALIZED", normalized_text)
+        logger.log("APP_INVOKE_START", f"message_count_before={len(messages)}")
+
+        messages.append(HumanMessage(content=normalized_text))
+
+        # Stream assistant tokens as they arrive; the "values" events carry the latest full state.
+        msg = cl.Message(content="")
+        async for mode, payload in app.astream({"messages": messages}, stream_mode=["messages", "values"]):
+            if mode == "messages":
+                chunk, meta = payload
+                if (
+                    isinstance(chunk, AIMessageChunk)
+                    and meta.get("langgraph_node") == "ASSISTANT"
+                    and isinstance(chunk.content, str)
+                    and chunk.content
+                ):
+                    await msg.stream_token(chunk.content)
+            else:
+                messages = payload["messages"]
         cl.user_session.set("messages", messages)
         delta_messages = messages[prev_len:]
-        _append_log(log_path, "APP_INVOKE_END", f"message_count_after={len(messages)}")
+        logger.log("APP_INVOKE_END", f"message_count_after={len(messages)}")
 
         last = messages[-1]
         if isinstance(last, AIMessage):
@@ -129,10 +156,13 @@ async def on_message(message: cl.Message) -> None:
         else:
             content = "已处理。"
 
-        _append_log(log_path, "ASSISTANT_FINAL", content)
-        elements = _extract_policy_asset_elements(delta_messages)
-        await cl.Message(content=content, elements=elements).send()
+        logger.log("ASSISTANT_FINAL", content)
+        msg.content = content
+        msg.elements = _extract_policy_asset_elements(delta_messages)
+        await msg.send()
     except Exception as e:
         err = f"{e}\n\n{traceback.format_exc()}"
-        _append_log(log_path, "ON_MESSAGE_ERROR", err)
+        logger.log("ON_MESSAGE_ERROR", err)
+        # History is appended in place; drop the failed turn so it does not leave dangling tool calls.
+        del messages[prev_len:]
         await cl.Message(content=f"处理请求时发生错误：{e}").send()
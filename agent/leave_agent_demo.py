@@ -1,14 +1,20 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from time import perf_counter
+from time import monotonic, perf_counter
 from pathlib import Path
-from typing import Any, Dict, List, TypedDict
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
 
+import orjson
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import BaseTool
 from langgraph.graph import StateGraph, START, END
 
@@ -17,6 +23,7 @@ from tool.tools import (
     policy_lookup,
     policy_asset_lookup,
     leave_balance_lookup,
+    leave_balance_batch_lookup,
     case_create,
     case_update,
     eligibility_engine,
@@ -28,22 +35,75 @@ TOOLS: List[BaseTool] = [
     policy_lookup,
     policy_asset_lookup,
     leave_balance_lookup,
+    leave_balance_batch_lookup,
     case_create,
     case_update,
     eligibility_engine,
 ]
 TOOL_MAP = {t.name: t for t in TOOLS}
 
+PROFILE_CACHE_TTL_S = 300.0
+_profile_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+
 
 class AgentState(TypedDict):
     messages: List[BaseMessage]
 
 
-def _append_log(log_path: str, title: str, content: str) -> None:
-    p = Path(log_path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("a", encoding="utf-8") as f:
-        f.write(f"\n## {title}\n\n{content}\n")
+def _to_json(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    # orjson emits UTF-8 (no ASCII escaping) and is several times faster than json.dumps.
+    option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return orjson.dumps(obj, default=str, option=option).decode()
+
+
+class SessionLogger:
+    """
+    Append-only markdown session log.
+
+    The file is opened once per session and written by a daemon thread, so log() only
+    enqueues and never blocks the LLM/tool path. Writes are flushed whenever the queue drains.
+    """
+
+    def __init__(self, log_path: str) -> None:
+        p = Path(log_path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        self.log_path = str(p)
+        self._f = p.open("a", encoding="utf-8")
+        self._q: queue.Queue[Optional[str]] = queue.Queue()
+        self._writer = threading.Thread(target=self._drain, name="session-logger", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def log(self, title: str, content: str) -> None:
+        self._q.put_nowait(f"\n## {title}\n\n{content}\n")
+
+    def _drain(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            self._f.write(item)
+            if self._q.empty():
+                self._f.flush()
+        self._f.close()
+
+    def close(self) -> None:
+        atexit.unregister(self.close)
+        if self._writer.is_alive():
+            self._q.put_nowait(None)
+            self._writer.join()
+
+
+def _cached_directory_lookup(lookup_by: str, value: str, ttl: float = PROFILE_CACHE_TTL_S) -> Dict[str, Any]:
+    # SSO identity rarely changes; reuse the profile across sessions instead of hitting the directory API.
+    key = (lookup_by, value)
+    hit = _profile_cache.get(key)
+    if hit is not None and monotonic() - hit[0] < ttl:
+        return hit[1]
+
+    profile = directory_lookup.invoke({"lookup_by": lookup_by, "value": value})
+    _profile_cache[key] = (monotonic(), profile)
+    return profile
 
 
 def _build_system_prompt(user_profile: Dict[str, Any]) -> str:
@@ -92,6 +152,7 @@ Available tools and what each does:
 - policy_lookup(policy_group, query, top_k): retrieve policy chunks and doc names.
 - policy_asset_lookup(policy_group, intent, cited_docs, answer_text, top_k): retrieve attachment candidates.
 - leave_balance_lookup(employee_id, leave_type): query actual leave balance in system. leave type only can be ANNUAL or SICK.
+- leave_balance_batch_lookup(employee_ids, leave_type): same as leave_balance_lookup for several employees in one call; prefer it over repeated leave_balance_lookup.
 - case_create(requester_id, case_type, payload_json): create DRAFT case.
 - case_update(case_id, status, payload_json?): update case status/payload.
 - eligibility_engine(...): deterministic leave checks; returns eligibility and approval chain.
@@ -203,94 +264,125 @@ def _normalize_user_turn(messages: List[BaseMessage], user_text: str) -> str:
     return user_text
 
 
-def build_graph(llm_with_tools, system_prompt: str, log_path: str):
+def build_graph(llm_with_tools, system_prompt: str, logger: SessionLogger):
+    # The system prompt is fixed for the session; build the message once and reuse it every turn.
+    system_message = SystemMessage(content=system_prompt)
+
     def node_assistant(state: AgentState) -> Dict[str, Any]:
         messages = state["messages"]
-        ai_msg = llm_with_tools.invoke([SystemMessage(content=system_prompt), *messages])
+        ai_msg = llm_with_tools.invoke([system_message, *messages])
 
-        tool_calls = getattr(ai_msg, "tool_calls", []) or []
-        _append_log(
-            log_path,
+        # AIMessage.tool_calls is always a list; read it directly instead of re-normalizing.
+        logger.log(
             "ASSISTANT",
-            json.dumps(
+            _to_json(
                 {
                     "content": ai_msg.content,
-                    "tool_calls": tool_calls,
+                    "tool_calls": ai_msg.tool_calls,
                 },
-                ensure_ascii=False,
-                indent=2,
-                default=str,
+                indent=True,
             ),
         )
-        return {"messages": [*messages, ai_msg]}
+        messages.append(ai_msg)
+        return {"messages": messages}
+
+    def start_record(tc: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "tool_name": tc["name"],
+            "args": tc.get("args", {}),
+            "started_at": datetime.now().isoformat(timespec="milliseconds"),
+        }
+
+    def finish_record(
+        record: Dict[str, Any], t0: float, result: Any, error: Optional[Exception]
+    ) -> Tuple[Dict[str, Any], str, Optional[Exception]]:
+        record["ended_at"] = datetime.now().isoformat(timespec="milliseconds")
+        record["elapsed_ms"] = round((perf_counter() - t0) * 1000, 2)
+        if error is not None:
+            record.update({"success": False, "error": str(error)})
+            return record, "", error
+
+        # Serialize the result once: the same string is the ToolMessage content and is embedded in the log record.
+        # Sorted keys keep identical results byte-identical in the prompt across runs.
+        result_json = _to_json(result, sort_keys=True)
+        record.update({"success": True, "result": orjson.Fragment(result_json)})
+        return record, result_json, None
+
+    def run_tool_call(tc: Dict[str, Any]) -> Tuple[Dict[str, Any], str, Optional[Exception]]:
+        record = start_record(tc)
+        t0 = perf_counter()
+        result: Any = None
+        error: Optional[Exception] = None
+        try:
+            result = TOOL_MAP[tc["name"]].invoke(record["args"])
+        except Exception as e:
+            error = e
+        return finish_record(record, t0, result, error)
+
+    async def arun_tool_call(tc: Dict[str, Any]) -> Tuple[Dict[str, Any], str, Optional[Exception]]:
+        record = start_record(tc)
+        t0 = perf_counter()
+        result: Any = None
+        error: Optional[Exception] = None
+        try:
+            result = await TOOL_MAP[tc["name"]].ainvoke(record["args"])
+        except Exception as e:
+            error = e
+        return finish_record(record, t0, result, error)
+
+    def pending_tool_calls(messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+        last = messages[-1]
+        if not isinstance(last, AIMessage) or not last.tool_calls:
+            return []
+
+        # Keep the model's emission order: ToolMessages must follow the AIMessage's function-call order, and
+        # call ids are random uuids for Gemini, so any id-based sort would reshuffle the prompt prefix per run.
+        tool_calls = list(last.tool_calls)
+        for tc in tool_calls:
+            if tc["name"] not in TOOL_MAP:
+                raise RuntimeError(f"Unknown tool call: {tc['name']}")
+        return tool_calls
+
+    def apply_outcomes(
+        messages: List[BaseMessage],
+        tool_calls: List[Dict[str, Any]],
+        outcomes: List[Tuple[Dict[str, Any], str, Optional[Exception]]],
+    ) -> Dict[str, Any]:
+        for tc, (record, _, _) in zip(tool_calls, outcomes):
+            logger.log(f"TOOL::{tc['name']}", _to_json(record, indent=True))
+
+        for _, _, error in outcomes:
+            if error is not None:
+                raise error
+        messages.extend(
+            ToolMessage(content=result_json, tool_call_id=tc["id"])
+            for tc, (_, result_json, _) in zip(tool_calls, outcomes)
+        )
+        return {"messages": messages}
 
     def node_tools(state: AgentState) -> Dict[str, Any]:
         messages = state["messages"]
-        last = messages[-1]
-        if not isinstance(last, AIMessage) or not last.tool_calls:
+        tool_calls = pending_tool_calls(messages)
+        if not tool_calls:
+            return {"messages": messages}
+
+        # Tool calls emitted in one turn are independent I/O; run them concurrently.
+        if len(tool_calls) == 1:
+            outcomes = [run_tool_call(tool_calls[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(tool_calls)) as pool:
+                outcomes = list(pool.map(run_tool_call, tool_calls))
+        return apply_outcomes(messages, tool_calls, outcomes)
+
+    async def anode_tools(state: AgentState) -> Dict[str, Any]:
+        # Async graph runs (chainlit) gather the calls on the event loop; HTTP tools await httpx directly.
+        messages = state["messages"]
+        tool_calls = pending_tool_calls(messages)
+        if not tool_calls:
             return {"messages": messages}
 
-        out_messages = [*messages]
-        for tc in last.tool_calls:
-            name = tc["name"]
-            args = tc.get("args", {})
-            if name not in TOOL_MAP:
-                raise RuntimeError(f"Unknown tool call: {name}")
-
-            started_at = datetime.now().isoformat(timespec="milliseconds")
-            t0 = perf_counter()
-            try:
-                result = TOOL_MAP[name].invoke(args)
-                elapsed_ms = round((perf_counter() - t0) * 1000, 2)
-                ended_at = datetime.now().isoformat(timespec="milliseconds")
-                _append_log(
-                    log_path,
-                    f"TOOL::{name}",
-                    json.dumps(
-                        {
-                            "tool_name": name,
-                            "args": args,
-                            "started_at": started_at,
-                            "ended_at": ended_at,
-                            "elapsed_ms": elapsed_ms,
-                            "success": True,
-                            "result": result,
-                        },
-                        ensure_ascii=False,
-                        indent=2,
-                        default=str,
-                    ),
-                )
-            except Exception as e:
-                elapsed_ms = round((perf_counter() - t0) * 1000, 2)
-                ended_at = datetime.now().isoformat(timespec="milliseconds")
-                _append_log(
-                    log_path,
-                    f"TOOL::{name}",
-                    json.dumps(
-                        {
-                            "tool_name": name,
-                            "args": args,
-                            "started_at": started_at,
-                            "ended_at": ended_at,
-                            "elapsed_ms": elapsed_ms,
-                            "success": False,
-                            "error": str(e),
-                        },
-                        ensure_ascii=False,
-                        indent=2,
-                        default=str,
-                    ),
-                )
-                raise
-            out_messages.append(
-                ToolMessage(
-                    content=json.dumps(result, ensure_ascii=False, default=str),
-                    tool_call_id=tc["id"],
-                )
-            )
-
-        return {"messages": out_messages}
+        outcomes = await asyncio.gather(*(arun_tool_call(tc) for tc in tool_calls))
+        return apply_outcomes(messages, tool_calls, list(outcomes))
 
     def route_after_assistant(state: AgentState) -> str:
         last = state["messages"][-1]
@@ -300,7 +392,7 @@ def build_graph(llm_with_tools, system_prompt: str, log_path: str):
 
     graph = StateGraph(AgentState)
     graph.add_node("ASSISTANT", node_assistant)
-    graph.add_node("TOOLS", node_tools)
+    graph.add_node("TOOLS", RunnableLambda(node_tools, afunc=anode_tools))
 
     graph.add_edge(START, "ASSISTANT")
     graph.add_conditional_edges("ASSISTANT", route_after_assistant)
@@ -312,7 +404,7 @@ def main() -> None:
     sso_email = os.getenv("SSO_EMAIL", "xiaoming@company.com")
 
     try:
-        profile = directory_lookup.invoke({"lookup_by": "email", "value": sso_email})
+        profile = _cached_directory_lookup("email", sso_email)
     except Exception as e:
         print(f"身份识别失败: {e}")
         return
@@ -321,7 +413,8 @@ def main() -> None:
 
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     log_path = str(Path(__file__).resolve().parent / "logs" / f"session_{run_id}.md")
-    _append_log(log_path, "SESSION_START", f"sso_email={sso_email}")
+    logger = SessionLogger(log_path)
+    logger.log("SESSION_START", f"sso_email={sso_email}")
 
     llm = ChatGoogleGenerativeAI(
         model="gemini-2.0-flash",
@@ -329,7 +422,7 @@ def main() -> None:
         api_key=os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"),
     )
     system_prompt = _build_system_prompt(profile)
-    app = build_graph(llm.bind_tools(TOOLS), system_prompt, log_path)
+    app = build_graph(llm.bind_tools(TOOLS), system_prompt, logger)
 
     print(f"[Fake SSO] 当前用户: {sso_email}")
     print(f"你好，{name}。我能为你做些什么？")
@@ -345,10 +438,10 @@ def main() -> None:
         if not user_text:
             continue
 
-        _append_log(log_path, "USER", user_text)
+        logger.log("USER", user_text)
         normalized_user_text = _normalize_user_turn(messages, user_text)
-        _append_log(log_path, "USER_NORMALIZED", normalized_user_text)
-        messages = [*messages, HumanMessage(content=normalized_user_text)]
+        logger.log("USER_NORMALIZED", normalized_user_text)
+        messages.append(HumanMessage(content=normalized_user_text))
 
         out = app.invoke({"messages": messages})
         messages = out["messages"]
@@ -356,7 +449,7 @@ def main() -> None:
         last = messages[-1]
         if isinstance(last, AIMessage):
             print(last.content)
-            _append_log(log_path, "ASSISTANT_FINAL", str(last.content))
+            logger.log("ASSISTANT_FINAL", str(last.content))
 
 
 if __name__ == "__main__":
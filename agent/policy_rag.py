@@ -3,7 +3,7 @@ from __future__ import annotations
 import argparse
 import json
 import os
-from typing import Callable, List, Literal, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional
 
 from pydantic import BaseModel
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -40,12 +40,32 @@ class PolicyExtractionResult(BaseModel):
     data: Optional[LeavePolicy] = None
 
 
-def run_policy_rag(
+_STRUCTURED_LLM = None
+
+
+def _get_structured_llm():
+    global _STRUCTURED_LLM
+    if _STRUCTURED_LLM is None:
+        llm = ChatGoogleGenerativeAI(
+            model="gemini-2.0-flash",
+            temperature=0.1,
+            api_key=os.getenv("GOOGLE_API_KEY"),
+        )
+        # A JSON-schema dict (not the model class) makes the runnable return a plain dict:
+        # Gemini still enforces the schema, but no pydantic objects are built per call.
+        _STRUCTURED_LLM = llm.with_structured_output(
+            PolicyExtractionResult.model_json_schema(),
+            method="json_schema",
+        )
+    return _STRUCTURED_LLM
+
+
+def run_policy_rag_raw(
     query: str,
     policy_group: str = "FTE_CN_GZ",
     top_k: int = 4,
     debug_log: Optional[Callable[[str, str], None]] = None,
-) -> PolicyExtractionResult:
+) -> Dict[str, Any]:
     retrieval = policy_lookup.invoke({"policy_group": policy_group, "query": query, "top_k": top_k})
     chunks = retrieval["chunks"]
 
@@ -56,13 +76,7 @@ def run_policy_rag(
         )
     context_text = "\n\n".join(context_blocks)
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
-        temperature=0.1,
-        api_key=os.getenv("GOOGLE_API_KEY"),
-    )
-
-    structured_llm = llm.with_structured_output(PolicyExtractionResult)
+    structured_llm = _get_structured_llm()
 
     prompt = f"""
 You are an HR policy parser.
@@ -89,10 +103,22 @@ Retrieved chunks:
 
     result = structured_llm.invoke(prompt)
     if debug_log:
-        debug_log("policy_rag_result", json.dumps(result.model_dump(), ensure_ascii=False, indent=2))
+        debug_log("policy_rag_result", json.dumps(result, ensure_ascii=False, indent=2))
     return result
 
 
+def run_policy_rag(
+    query: str,
+    policy_group: str = "FTE_CN_GZ",
+    top_k: int = 4,
+    debug_log: Optional[Callable[[str, str], None]] = None,
+) -> PolicyExtractionResult:
+    """Typed wrapper; callers that only read fields should use run_policy_rag_raw."""
+    return PolicyExtractionResult.model_validate(
+        run_policy_rag_raw(query=query, policy_group=policy_group, top_k=top_k, debug_log=debug_log)
+    )
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--query", default="I am a contractor, can I ask for annual leave?")
@@ -100,9 +126,9 @@ if __name__ == "__main__":
     parser.add_argument("--top-k", type=int, default=4)
     args = parser.parse_args()
 
-    result = run_policy_rag(
+    result = run_policy_rag_raw(
         query=args.query,
         policy_group=args.policy_group,
         top_k=args.top_k,
     )
-    print(json.dumps(result.model_dump(), ensure_ascii=False, indent=2))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
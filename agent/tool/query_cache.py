@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, Optional, Tuple
+
+
+def normalize_query(text: str) -> str:
+    # Same normalization as the backend's query-embedding cache: case and whitespace only.
+    # Anything coarser (bags of words, trigram sketches) lets "annual" vs "sick" or "5" vs "10 days" collide.
+    return " ".join(text.split()).lower()
+
+
+class QueryCache:
+    """
+    Exact-match LRU cache keyed by (namespace, normalized query), with a per-entry TTL.
+
+    Only questions that are identical after normalize_query() share an entry; near-duplicates miss.
+    Process-local and never persisted: the agent cannot see /policy/ingest or a purge, so the TTL
+    bounds how long it may serve chunks from a superseded corpus.
+    """
+
+    def __init__(self, capacity: int = 4096, ttl: float = 600) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: OrderedDict[Tuple[Hashable, str], Tuple[float, Any]] = OrderedDict()
+        # Tool calls may run on worker threads concurrently.
+        self._lock = threading.Lock()
+
+    def get(self, namespace: Hashable, query: str) -> Optional[Any]:
+        key = (namespace, normalize_query(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, namespace: Hashable, query: str, value: Any) -> None:
+        key = (namespace, normalize_query(query))
+        with self._lock:
+            self._entries[key] = (monotonic(), value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
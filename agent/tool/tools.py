@@ -1,11 +1,14 @@
-import requests
+import functools
 from datetime import date, datetime
-from typing import Any, Dict, Optional, Union, List
+from typing import Any, Callable, Dict, Optional, Tuple, Union, List
 
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool, tool
 
 from tool.utils import (
     API_BASE,
+    _acall_api,
+    _call_api,
+    _min_submit_date,
     _normalize_payload_json,
     _parse_date_iso,
     _rank_assets,
@@ -86,77 +89,84 @@ def policy_and_asset_lookup(
 
 
 
+# Backend tools are written once as request builders returning (method, url, json body).
+# api_tool() wraps each into a StructuredTool whose sync path (pooled requests.Session) and async path
+# (pooled httpx client, so independent calls can be gathered on one loop) send the same request.
+ApiRequest = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+def api_tool(build_request: Callable[..., ApiRequest]) -> StructuredTool:
+    @functools.wraps(build_request)
+    def func(*args: Any, **kwargs: Any) -> Any:
+        return _call_api(*build_request(*args, **kwargs))
+
+    @functools.wraps(build_request)
+    async def coroutine(*args: Any, **kwargs: Any) -> Any:
+        return await _acall_api(*build_request(*args, **kwargs))
+
+    # Name, description and args schema come from the builder's signature and docstring, as with @tool.
+    return StructuredTool.from_function(func=func, coroutine=coroutine)
+
+
 # Tool2 – People Directory Lookup
-@tool
-def directory_lookup(lookup_by: str, value: str) -> Dict[str, Any]:
+@api_tool
+def directory_lookup(lookup_by: str, value: str) -> ApiRequest:
     """Lookup an employee profile (and manager profile) by email or employee_id."""
     if lookup_by == "email":
-        url = f"{API_BASE}/directory/by-email/{value}"
-    elif lookup_by == "employee_id":
-        url = f"{API_BASE}/directory/by-id/{value}"
-    else:
-        raise ValueError("lookup_by must be 'email' or 'employee_id'")
+        return "GET", f"{API_BASE}/directory/by-email/{value}", None
+    if lookup_by == "employee_id":
+        return "GET", f"{API_BASE}/directory/by-id/{value}", None
+    raise ValueError("lookup_by must be 'email' or 'employee_id'")
 
-    r = requests.get(url, timeout=10)
-    r.raise_for_status()
-    return r.json()
 
-
-@tool
-def leave_balance_lookup(employee_id: str, leave_type: str = "ANNUAL") -> Dict[str, Any]:
+@api_tool
+def leave_balance_lookup(employee_id: str, leave_type: str = "ANNUAL") -> ApiRequest:
     """Get leave balance for one leave type."""
-    url = f"{API_BASE}/leave-balances/{employee_id}/{leave_type}"
-    r = requests.get(url, timeout=10)
-    r.raise_for_status()
-    return r.json()
+    return "GET", f"{API_BASE}/leave-balances/{employee_id}/{leave_type}", None
+
+
+@api_tool
+def leave_balance_batch_lookup(employee_ids: List[str], leave_type: str = "ANNUAL") -> ApiRequest:
+    """Get one leave type's balance for several employees in a single call."""
+    body = {"items": [{"employee_id": e, "leave_type": leave_type} for e in employee_ids]}
+    return "POST", f"{API_BASE}/leave-balances/batch", body
 
 
 # Tool3 – Case/Ticket Create
-@tool
+@api_tool
 def case_create(
     requester_id: str,
     case_type: str,
     payload_json: Optional[Union[Dict[str, Any], str]] = None,
-) -> Dict[str, Any]:
+) -> ApiRequest:
     """Create a new HR case. Returns the created case object."""
-    url = f"{API_BASE}/cases"
     body = {
         "requester_id": requester_id,
         "case_type": case_type,
         "payload_json": _normalize_payload_json(payload_json),
     }
-    r = requests.post(url, json=body, timeout=10)
-    r.raise_for_status()
-    return r.json()
+    return "POST", f"{API_BASE}/cases", body
 
 
-@tool
-def case_get(case_id: str) -> Dict[str, Any]:
+@api_tool
+def case_get(case_id: str) -> ApiRequest:
     """Get a case by case_id (UUID string)."""
-    url = f"{API_BASE}/cases/{case_id}"
-    r = requests.get(url, timeout=10)
-    r.raise_for_status()
-    return r.json()
+    return "GET", f"{API_BASE}/cases/{case_id}", None
 
 
-@tool
+@api_tool
 def case_update(
     case_id: str,
     status: Optional[str] = None,
     payload_json: Optional[Union[Dict[str, Any], str]] = None,
-) -> Dict[str, Any]:
+) -> ApiRequest:
     """Patch a case (status and/or payload_json)."""
-    url = f"{API_BASE}/cases/{case_id}"
     body: Dict[str, Any] = {}
-
     if status is not None:
         body["status"] = status
     if payload_json is not None:
         body["payload_json"] = _normalize_payload_json(payload_json)
-
-    r = requests.patch(url, json=body, timeout=10)
-    r.raise_for_status()
-    return r.json()
+    return "PATCH", f"{API_BASE}/cases/{case_id}", body
 
 
 
@@ -184,9 +194,10 @@ def eligibility_engine(
     - Default manager
     - If requested_units > 3 days, add dept head
     """
-    run_date = _parse_date_iso(today) if today else date.today()
+    run_date_iso = today or date.today().isoformat()
+    run_date = _parse_date_iso(run_date_iso)
     start = _parse_date_iso(start_date)
-    min_submit_date = run_date.fromordinal(run_date.toordinal() + advance_days_required)
+    min_submit_date = _min_submit_date(run_date_iso, advance_days_required)
 
     reasons: List[str] = []
     if available_units < requested_units:
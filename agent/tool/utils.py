@@ -1,40 +1,181 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
 from datetime import date, datetime
+from functools import lru_cache
+from time import monotonic
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tool.query_cache import QueryCache
 
 
 API_BASE = os.getenv("API_BASE", "http://localhost:8000")
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
 
+def _build_http_session() -> requests.Session:
+    # One agent turn fires several calls to API_BASE; keep-alive avoids a new TCP handshake per call.
+    # urllib3 only retries idempotent methods by default, so POST/PATCH are never replayed.
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504]),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
+
+
+_SESSION = _build_http_session()
+
+# httpx connections are bound to the event loop that opened them; keep one client per loop
+# (chainlit runs a single loop, asyncio.run() callers get a fresh one each time).
+# HTTP/2 stays off: uvicorn only speaks HTTP/1.1, so keep-alive pooling is what we gain.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            headers={"Accept": "application/json"},
+        )
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+# Conditional GET cache for API responses that carry an ETag (directory, leave balances).
+# Within Cache-Control max-age the stored payload is returned without a request; after that the
+# request carries If-None-Match and a 304 reuses the stored payload.
+_HTTP_CACHE_SIZE = 512
+_HTTP_CACHE: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()  # url -> (fresh_until, etag, payload)
+_HTTP_CACHE_LOCK = threading.Lock()
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+_NOT_CACHED = object()
+
+
+def _http_cache_lookup(url: str) -> Tuple[Any, Dict[str, str]]:
+    with _HTTP_CACHE_LOCK:
+        entry = _HTTP_CACHE.get(url)
+    if entry is None:
+        return _NOT_CACHED, {}
+    fresh_until, etag, payload = entry
+    if monotonic() < fresh_until:
+        return payload, {}
+    return _NOT_CACHED, {"If-None-Match": etag}
+
+
+def _http_cache_resolve(url: str, r: Union[requests.Response, httpx.Response]) -> Any:
+    """Payload for a GET response, refreshing the cache; _NOT_CACHED if a 304 lost its entry meanwhile."""
+    if r.status_code == 304:
+        with _HTTP_CACHE_LOCK:
+            entry = _HTTP_CACHE.get(url)
+        if entry is None:
+            return _NOT_CACHED
+        payload = entry[2]
+    else:
+        r.raise_for_status()
+        payload = r.json()
+
+    etag = r.headers.get("etag")
+    if etag:
+        m = _MAX_AGE.search(r.headers.get("cache-control", ""))
+        fresh_until = monotonic() + (int(m.group(1)) if m else 0)
+        with _HTTP_CACHE_LOCK:
+            _HTTP_CACHE[url] = (fresh_until, etag, payload)
+            _HTTP_CACHE.move_to_end(url)
+            if len(_HTTP_CACHE) > _HTTP_CACHE_SIZE:
+                _HTTP_CACHE.popitem(last=False)
+    return payload
+
+
+def _get_json(url: str, timeout: float = 10) -> Any:
+    payload, headers = _http_cache_lookup(url)
+    if payload is not _NOT_CACHED:
+        return payload
+    payload = _http_cache_resolve(url, _SESSION.get(url, headers=headers, timeout=timeout))
+    if payload is _NOT_CACHED:
+        payload = _http_cache_resolve(url, _SESSION.get(url, timeout=timeout))
+    return payload
+
+
+async def _aget_json(url: str) -> Any:
+    payload, headers = _http_cache_lookup(url)
+    if payload is not _NOT_CACHED:
+        return payload
+    client = _get_async_client()
+    payload = _http_cache_resolve(url, await client.get(url, headers=headers))
+    if payload is _NOT_CACHED:
+        payload = _http_cache_resolve(url, await client.get(url))
+    return payload
+
+
+def _call_api(method: str, url: str, body: Optional[Dict[str, Any]] = None) -> Any:
+    if method == "GET":
+        return _get_json(url)
+    r = _SESSION.request(method, url, json=body, timeout=10)
+    r.raise_for_status()
+    return r.json()
+
+
+async def _acall_api(method: str, url: str, body: Optional[Dict[str, Any]] = None) -> Any:
+    if method == "GET":
+        return await _aget_json(url)
+    r = await _get_async_client().request(method, url, json=body)
+    r.raise_for_status()
+    return r.json()
+
+
+# Repeated policy questions (same text up to case/whitespace) reuse the previous retrieval and skip the
+# API round trip. Exact match only: near-duplicate questions can need different chunks.
+_POLICY_CACHE = QueryCache(capacity=4096, ttl=600)
+
+
 def _normalize_payload_json(payload_json: Optional[Union[Dict[str, Any], str]]) -> Dict[str, Any]:
     if payload_json is None:
         return {}
     if isinstance(payload_json, dict):
         return payload_json
     if isinstance(payload_json, str):
-        s = payload_json.strip()
-        if s.startswith("{") and s.endswith("}"):
-            try:
-                parsed = json.loads(s)
-                if isinstance(parsed, dict):
-                    return parsed
-            except Exception:
-                pass
-        return {"note": payload_json}
+        # orjson rejects free text at the first byte, so no separate "{...}" pre-check is needed.
+        try:
+            parsed = orjson.loads(payload_json)
+        except orjson.JSONDecodeError:
+            return {"note": payload_json}
+        return parsed if isinstance(parsed, dict) else {"note": payload_json}
     return {"note": str(payload_json)}
 
 
+# Eligibility checks see the same handful of ISO dates over and over; strptime is the costly part.
+@lru_cache(maxsize=1024)
 def _parse_date_iso(value: str) -> date:
     return datetime.strptime(value, "%Y-%m-%d").date()
 
 
+@lru_cache(maxsize=1024)
+def _min_submit_date(run_date_iso: str, advance_days: int) -> date:
+    # Keyed on the resolved run date (never None), so a cached value cannot go stale past midnight.
+    run_date = _parse_date_iso(run_date_iso)
+    return run_date.fromordinal(run_date.toordinal() + advance_days)
+
+
 def _tokenize(text: str) -> List[str]:
     if not text:
         return []
@@ -47,7 +188,7 @@ def _tokenize(text: str) -> List[str]:
 def _load_assets_from_api(policy_group: str) -> List[Dict[str, Any]]:
     url = f"{API_BASE}/policy-assets/list"
     body = {"policy_group": policy_group}
-    r = requests.post(url, json=body, timeout=10)
+    r = _SESSION.post(url, json=body, timeout=10)
     r.raise_for_status()
     payload = r.json()
     assets = payload.get("assets", [])
@@ -55,11 +196,18 @@ def _load_assets_from_api(policy_group: str) -> List[Dict[str, Any]]:
 
 
 def _retrieve_policy_chunks(policy_group: str, query: str, top_k: int) -> Dict[str, Any]:
+    namespace = (policy_group, top_k)
+    cached = _POLICY_CACHE.get(namespace, query)
+    if cached is not None:
+        return {**cached, "query": query}
+
     url = f"{API_BASE}/policy/retrieve"
     body = {"policy_group": policy_group, "query": query, "top_k": top_k}
-    r = requests.post(url, json=body, timeout=20)
+    r = _SESSION.post(url, json=body, timeout=20)
     r.raise_for_status()
-    return r.json()
+    payload = r.json()
+    _POLICY_CACHE.put(namespace, query, payload)
+    return payload
 
 
 def _rank_assets(
@@ -1,4 +1,6 @@
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from be.routers.directory import router as directory_router
 from be.routers.leave_balances import router as leave_balances_router
@@ -6,7 +8,9 @@ from be.routers.cases import router as cases_router
 from be.routers.policy import router as policy_router
 from be.routers.policy_assets import router as policy_assets_router
 
-app = FastAPI(title="HR Agent Day1 API", version="0.1.0")
+app = FastAPI(title="HR Agent Day1 API", version="0.1.0", default_response_class=ORJSONResponse)
+# Policy chunk lists and directory payloads repeat the same keys; small bodies are not worth compressing.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 app.include_router(directory_router)
 app.include_router(leave_balances_router)
@@ -4,8 +4,11 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 import uuid
 
+import numpy as np
+import orjson
+
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Integer, Text, Boolean
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, Index, Integer, Text, Boolean, LargeBinary, text
 from sqlalchemy.types import UserDefinedType
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
@@ -19,15 +22,31 @@ class VectorType(UserDefinedType):
         return f"VECTOR({self.dims})"
 
     def bind_processor(self, dialect):
+        # pgvector's text form "[x,y,...]" is a JSON array; orjson writes all 3072 floats in C
+        # (numpy arrays included) instead of one str(float(x)) call per element.
         def process(value):
             if value is None:
                 return None
-            if isinstance(value, list):
-                return "[" + ",".join(str(float(x)) for x in value) + "]"
+            if isinstance(value, (list, np.ndarray)):
+                return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
             return value
 
         return process
 
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or isinstance(value, list):
+                return value
+            return orjson.loads(value)
+
+        return process
+
+
+class HalfVectorType(VectorType):
+    # Same "[x,y,...]" wire format; Postgres stores it as fp16.
+    def get_col_spec(self, **kw):
+        return f"HALFVEC({self.dims})"
+
 
 class Employees(SQLModel, table=True):
     __tablename__ = "employees"
@@ -38,7 +57,7 @@ class Employees(SQLModel, table=True):
     email: str = Field(sa_column=Column(String, nullable=False, unique=True, index=True))
 
     employment_type: str = Field(sa_column=Column(String, nullable=False))  # e.g., FTE/Contractor
-    location: str = Field(sa_column=Column(String, nullable=False))
+    location: str = Field(sa_column=Column(String, nullable=False, index=True))  # HRBP lookup filters on it
     department: str = Field(sa_column=Column(String, nullable=False))
     grade: str = Field(sa_column=Column(String, nullable=False))
     leave_policy_group: str = Field(sa_column=Column(String, nullable=False))
@@ -76,7 +95,14 @@ class LeaveBalances(SQLModel, table=True):
 
 class Cases(SQLModel, table=True):
     __tablename__ = "cases"
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        # list_cases: WHERE requester_id = ? ORDER BY created_at DESC is a single ordered range scan.
+        # Leading requester_id column also serves the FK lookups, so no separate requester_id index.
+        Index("ix_cases_requester_created", "requester_id", text("created_at DESC")),
+        {"schema": "public"},
+    )
+    # Fetch server-generated created_at/updated_at via INSERT/UPDATE ... RETURNING, so handlers need no refresh().
+    __mapper_args__ = {"eager_defaults": True}
 
     case_id: str = Field(
     default_factory=lambda: str(uuid.uuid4()),
@@ -86,7 +112,6 @@ class Cases(SQLModel, table=True):
         sa_column=Column(
             ForeignKey("public.employees.employee_id", ondelete="RESTRICT"),
             nullable=False,
-            index=True,
         )
     )
 
@@ -115,6 +140,17 @@ class PolicyChunks(SQLModel, table=True):
     doc_name: str = Field(sa_column=Column(String, nullable=False))
     chunk_index: int = Field(sa_column=Column(Integer, nullable=False))
     content: str = Field(sa_column=Column(Text, nullable=False))
+    embedding: str = Field(sa_column=Column(HalfVectorType(3072), nullable=False))
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    )
+
+
+class EmbeddingCache(SQLModel, table=True):
+    __tablename__ = "embedding_cache"
+    __table_args__ = {"schema": "public"}
+
+    content_hash: bytes = Field(sa_column=Column(LargeBinary, primary_key=True))  # sha256 of model + chunk text
     embedding: str = Field(sa_column=Column(VectorType(3072), nullable=False))
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now())
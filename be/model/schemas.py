@@ -1,10 +1,13 @@
 from __future__ import annotations
+from datetime import datetime
 from typing import Optional, Any, Dict, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
 
 
 # -------- Directory --------
 class PersonProfile(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     employee_id: str
     name: str
     email: str
@@ -25,6 +28,8 @@ class DirectoryResponse(BaseModel):
 
 # -------- Leave Balances --------
 class LeaveBalanceItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     employee_id: str
     leave_type: str
     available_units: float
@@ -35,8 +40,22 @@ class LeaveBalancesResponse(BaseModel):
     balances: List[LeaveBalanceItem]
 
 
+class LeaveBalanceKey(BaseModel):
+    employee_id: str
+    leave_type: str
+
+
+class LeaveBalanceBatchRequest(BaseModel):
+    items: List[LeaveBalanceKey] = Field(..., min_length=1, max_length=500)
+
+
+class LeaveBalanceBatchResponse(BaseModel):
+    balances: List[LeaveBalanceItem]
+
+
 # -------- Cases --------
-ALLOWED_CASE_STATUS = {"DRAFT", "PENDING_APPROVAL", "APPROVED", "REJECTED"}
+ALLOWED_CASE_STATUS = frozenset({"DRAFT", "PENDING_APPROVAL", "APPROVED", "REJECTED"})
+_INVALID_STATUS_MSG = f"Invalid status. Allowed: {sorted(ALLOWED_CASE_STATUS)}"
 
 
 class CaseCreateRequest(BaseModel):
@@ -50,15 +69,35 @@ class CasePatchRequest(BaseModel):
     status: Optional[str] = None
     payload_json: Optional[Dict[str, Any]] = None
 
+    # Rejected while parsing the body, before patch_case opens a session.
+    @field_validator("status")
+    @classmethod
+    def check_status(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in ALLOWED_CASE_STATUS:
+            raise ValueError(_INVALID_STATUS_MSG)
+        return v
+
 
 class CaseResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     case_id: str
     requester_id: str
     case_type: str
     status: str
     payload_json: Dict[str, Any]
-    created_at: str
-    updated_at: str
+    created_at: datetime
+    updated_at: datetime
+
+    # Keep the wire format of the former str fields: isoformat() writes "+00:00", pydantic-core would write "Z".
+    @field_serializer("created_at", "updated_at")
+    def serialize_timestamp(self, v: datetime) -> str:
+        return v.isoformat()
+
+
+class CaseListResponse(BaseModel):
+    items: List[CaseResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next (older) page
 
 
 # -------- Policy RAG --------
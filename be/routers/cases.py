@@ -1,33 +1,44 @@
+import base64
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
-
-from be.config.db import get_session
-from be.model.models import Cases, Employees
-from be.model.schemas import CaseCreateRequest, CasePatchRequest, CaseResponse, ALLOWED_CASE_STATUS
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from be.config.db import get_async_session
+from be.model.models import Cases
+from be.model.schemas import (
+    CaseCreateRequest,
+    CaseListResponse,
+    CasePatchRequest,
+    CaseResponse,
+)
 
 router = APIRouter(prefix="/cases", tags=["cases"])
 
+FOREIGN_KEY_VIOLATION = "23503"  # SQLSTATE; exposed as .pgcode by both psycopg2 and SQLAlchemy's asyncpg adapter
+
+# Columns CaseResponse needs; listing selects these as plain rows instead of hydrating ORM entities.
+CASE_RESPONSE_COLUMNS = (
+    Cases.case_id,
+    Cases.requester_id,
+    Cases.case_type,
+    Cases.status,
+    Cases.payload_json,
+    Cases.created_at,
+    Cases.updated_at,
+)
+
 
 def to_case_response(c: Cases) -> CaseResponse:
-    return CaseResponse(
-        case_id=c.case_id,
-        requester_id=c.requester_id,
-        case_type=c.case_type,
-        status=c.status,
-        payload_json=c.payload_json,
-        created_at=c.created_at.isoformat(),
-        updated_at=c.updated_at.isoformat(),
-    )
+    return CaseResponse.model_validate(c)
 
 
 @router.post("", response_model=CaseResponse)
-def create_case(payload: CaseCreateRequest, session: Session = Depends(get_session)):
-    # requester 必须存在（避免脏数据）
-    requester = session.exec(select(Employees).where(Employees.employee_id == payload.requester_id)).first()
-    if not requester:
-        raise HTTPException(status_code=400, detail="requester_id does not exist")
-
+async def create_case(payload: CaseCreateRequest, session: AsyncSession = Depends(get_async_session)):
     c = Cases(
         requester_id=payload.requester_id,
         case_type=payload.case_type,
@@ -35,46 +46,83 @@ def create_case(payload: CaseCreateRequest, session: Session = Depends(get_sessi
         payload_json=payload.payload_json or {},
     )
     session.add(c)
-    session.commit()
-    session.refresh(c)
+    try:
+        await session.commit()
+    except IntegrityError as e:
+        await session.rollback()
+        # requester 必须存在（避免脏数据）: enforced by the cases.requester_id FK, no pre-check round trip.
+        # Only the FK violation means that; other constraint failures propagate unchanged.
+        if getattr(e.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=400, detail="requester_id does not exist") from e
+        raise
     return to_case_response(c)
 
 
-@router.get("/{case_id}", response_model=CaseResponse)
-def get_case(case_id: int, session: Session = Depends(get_session)):
-    c = session.get(Cases, case_id)
+@router.get("/{case_id}", response_model=CaseResponse, response_model_exclude_none=True)
+async def get_case(case_id: str, session: AsyncSession = Depends(get_async_session)):
+    c = await session.get(Cases, case_id)
     if not c:
         raise HTTPException(status_code=404, detail="Case not found")
     return to_case_response(c)
 
 
-@router.get("", response_model=list[CaseResponse])
-def list_cases(
+def encode_case_cursor(c: Cases) -> str:
+    # base64url keeps the cursor safe to paste into a query string unencoded ("+00:00" would decode to a space).
+    raw = f"{c.created_at.isoformat()}|{c.case_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_case_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, sep, case_id = raw.partition("|")
+        if not sep or not case_id:
+            raise ValueError(cursor)
+        return datetime.fromisoformat(created_at), case_id
+    except ValueError as e:  # covers binascii.Error and UnicodeDecodeError
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+@router.get("", response_model=CaseListResponse, response_model_exclude_none=True)
+async def list_cases(
     requester_id: str = Query(..., description="employee_id of requester"),
-    session: Session = Depends(get_session),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    rows = session.exec(select(Cases).where(Cases.requester_id == requester_id).order_by(Cases.created_at.desc())).all()
-    return [to_case_response(r) for r in rows]
+    # Keyset pagination, newest first. (created_at, case_id) keeps the order total when timestamps tie.
+    stmt = select(*CASE_RESPONSE_COLUMNS).where(Cases.requester_id == requester_id)
+    if cursor:
+        stmt = stmt.where(tuple_(Cases.created_at, Cases.case_id) < tuple_(*decode_case_cursor(cursor)))
+    stmt = stmt.order_by(Cases.created_at.desc(), Cases.case_id.desc()).limit(limit + 1)
+
+    # Row tuples expose the same attribute names as Cases, so from_attributes/encode_case_cursor take them as-is.
+    rows = (await session.exec(stmt)).all()
+    page = rows[:limit]
+    # One validate + dump pass in pydantic-core over the whole page (no per-row CaseResponse built in Python);
+    # returning a Response also skips FastAPI's second response_model validation.
+    resp = CaseListResponse.model_validate(
+        {"items": page, "next_cursor": encode_case_cursor(page[-1]) if len(rows) > limit else None},
+        from_attributes=True,
+    )
+    return Response(content=resp.model_dump_json(exclude_none=True), media_type="application/json")
 
 
 @router.patch("/{case_id}", response_model=CaseResponse)
-def patch_case(case_id: str, patch: CasePatchRequest, session: Session = Depends(get_session)):
-    c = session.get(Cases, case_id)
+async def patch_case(case_id: str, patch: CasePatchRequest, session: AsyncSession = Depends(get_async_session)):
+    c = await session.get(Cases, case_id)
     if not c:
         raise HTTPException(status_code=404, detail="Case not found")
 
     if patch.status is not None:
-        if patch.status not in ALLOWED_CASE_STATUS:
-            raise HTTPException(status_code=400, detail=f"Invalid status. Allowed: {sorted(ALLOWED_CASE_STATUS)}")
         c.status = patch.status
 
     if patch.payload_json is not None:
         c.payload_json = patch.payload_json
 
-    # updated_at 由 DB onupdate 处理；但为了 demo 直观，也可以手动 touch
-    c.updated_at = datetime.utcnow()
+    # 每次 PATCH 都 touch updated_at（包括空 patch / 值未变），由 DB now() 生成；eager_defaults 经 RETURNING 取回
+    c.updated_at = func.now()
 
     session.add(c)
-    session.commit()
-    session.refresh(c)
+    await session.commit()
     return to_case_response(c)
@@ -1,86 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from typing import Dict, List
 
-from be.config.db import get_session
+from fastapi import APIRouter, HTTPException, Request, Response
+from sqlalchemy import bindparam, true
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+
+from be.config.db import AsyncSessionLocal
 from be.model.models import Employees
 from be.model.schemas import DirectoryResponse, PersonProfile
+from be.services.batch_loader import BatchLoader
+from be.services.directory_cache import directory_cache_key, get_cached_directory, store_directory
+from be.services.http_cache import cached_json_response
 
 router = APIRouter(prefix="/directory", tags=["directory"])
 
 
 def to_profile(e: Employees) -> PersonProfile:
-    return PersonProfile(
-        employee_id=e.employee_id,
-        name=e.name,
-        email=e.email,
-        employment_type=e.employment_type,
-        location=e.location,
-        department=e.department,
-        grade=e.grade,
-        leave_policy_group=e.leave_policy_group,
-        manager_id=e.manager_id,
-    )
+    return PersonProfile.model_validate(e)
 
 
-def resolve_reporting_profiles(emp: Employees, session: Session):
-    manager_profile = None
-    skip_manager_profile = None
-    hrbp_profile = None
-
-    if emp.manager_id:
-        mgr = session.exec(select(Employees).where(Employees.employee_id == emp.manager_id)).first()
-        if mgr:
-            manager_profile = to_profile(mgr)
-            if mgr.manager_id:
-                skip = session.exec(select(Employees).where(Employees.employee_id == mgr.manager_id)).first()
-                if skip:
-                    skip_manager_profile = to_profile(skip)
+def hrbp_candidates(emp):
     # TODO: NEED TO REFINE HRBP LOGIC
     # Lightweight HRBP lookup heuristic for demo data:
     # prefer same location and profiles that look like HRBP (grade contains BP or department mentions HR).
-    hrbp = session.exec(
-        select(Employees).where(
-            (Employees.location == emp.location)
+    Hrbp = aliased(Employees)
+    return aliased(
+        Employees,
+        select(Hrbp)
+        .where(
+            (Hrbp.location == emp.location)
             & (
-                Employees.grade.ilike("%BP%")
-                | Employees.department.ilike("%HR%")
-                | Employees.department.ilike("%People%")
+                Hrbp.grade.ilike("%BP%")
+                | Hrbp.department.ilike("%HR%")
+                | Hrbp.department.ilike("%People%")
             )
         )
-    ).first()
-    if hrbp:
-        hrbp_profile = to_profile(hrbp)
+        .limit(1)
+        .lateral("hrbp"),
+    )
 
-    return manager_profile, skip_manager_profile, hrbp_profile
+
+def directory_statement(key_column):
+    # Employee, manager, skip-manager and HRBP come back in one round trip:
+    # two self-joins on manager_id plus a LATERAL top-1 HRBP pick at the employee's location.
+    Mgr = aliased(Employees)
+    Skip = aliased(Employees)
+    Hrbp = hrbp_candidates(Employees)
+    return (
+        select(Employees, Mgr, Skip, Hrbp)
+        .select_from(Employees)
+        .outerjoin(Mgr, Mgr.employee_id == Employees.manager_id)
+        .outerjoin(Skip, Skip.employee_id == Mgr.manager_id)
+        .outerjoin(Hrbp, true())
+        .where(key_column.in_(bindparam("keys", expanding=True)))
+    )
 
 
-@router.get("/by-email/{email}", response_model=DirectoryResponse)
-def get_by_email(email: str, session: Session = Depends(get_session)):
-    emp = session.exec(select(Employees).where(Employees.email == email)).first()
-    if not emp:
-        raise HTTPException(status_code=404, detail="Employee not found")
+# Built once at import; every request reuses the same statement, so its compiled SQL comes straight
+# from the engine's query cache instead of rebuilding aliases/joins per call.
+DIRECTORY_BY_EMAIL = directory_statement(Employees.email)
+DIRECTORY_BY_ID = directory_statement(Employees.employee_id)
 
-    manager_profile, skip_manager_profile, hrbp_profile = resolve_reporting_profiles(emp, session)
 
+def to_directory_response(row) -> DirectoryResponse:
+    emp, mgr, skip, hrbp = row
     return DirectoryResponse(
         employee_profile=to_profile(emp),
-        manager_profile=manager_profile,
-        skip_manager_profile=skip_manager_profile,
-        hrbp_profile=hrbp_profile,
+        manager_profile=to_profile(mgr) if mgr else None,
+        skip_manager_profile=to_profile(skip) if skip else None,
+        hrbp_profile=to_profile(hrbp) if hrbp else None,
     )
 
 
-@router.get("/by-id/{employee_id}", response_model=DirectoryResponse)
-def get_by_id(employee_id: str, session: Session = Depends(get_session)):
-    emp = session.exec(select(Employees).where(Employees.employee_id == employee_id)).first()
-    if not emp:
-        raise HTTPException(status_code=404, detail="Employee not found")
+def directory_batch(stmt, key_attr: str):
+    async def load(keys: List[str]) -> Dict[str, DirectoryResponse]:
+        # Runs outside any one request, so it opens its own session for the batch.
+        async with AsyncSessionLocal() as session:
+            rows = (await session.exec(stmt, params={"keys": keys})).all()
+        return {getattr(row[0], key_attr): to_directory_response(row) for row in rows}
 
-    manager_profile, skip_manager_profile, hrbp_profile = resolve_reporting_profiles(emp, session)
+    return load
 
-    return DirectoryResponse(
-        employee_profile=to_profile(emp),
-        manager_profile=manager_profile,
-        skip_manager_profile=skip_manager_profile,
-        hrbp_profile=hrbp_profile,
-    )
+
+# Concurrent cache misses (e.g. an org-chart view fanning out over by-id) that land in the same
+# event-loop tick share one "WHERE key IN (...)" query instead of one round trip each.
+directory_by_email_loader = BatchLoader(directory_batch(DIRECTORY_BY_EMAIL, "email"))
+directory_by_id_loader = BatchLoader(directory_batch(DIRECTORY_BY_ID, "employee_id"))
+
+
+async def resolve_directory(request: Request, field: str, value: str, loader: BatchLoader) -> Response:
+    key = directory_cache_key(field, value)
+    resp = await get_cached_directory(key)
+    if resp is None:
+        resp = await loader.load(value)
+        if resp is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        await store_directory(key, resp)
+    # Org data changes on the order of hours; match the local cache TTL so clients revalidate about once a minute.
+    return cached_json_response(request, resp, max_age=60)
+
+
+@router.get("/by-email/{email}", response_model=DirectoryResponse, response_model_exclude_none=True)
+async def get_by_email(email: str, request: Request):
+    return await resolve_directory(request, "email", email, directory_by_email_loader)
+
+
+@router.get("/by-id/{employee_id}", response_model=DirectoryResponse, response_model_exclude_none=True)
+async def get_by_id(employee_id: str, request: Request):
+    return await resolve_directory(request, "id", employee_id, directory_by_id_loader)
@@ -1,38 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import bindparam, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection
 
-from be.config.db import get_session
+from be.config.db import get_async_conn
 from be.model.models import LeaveBalances
-from be.model.schemas import LeaveBalancesResponse, LeaveBalanceItem
+from be.model.schemas import (
+    LeaveBalanceBatchRequest,
+    LeaveBalanceBatchResponse,
+    LeaveBalancesResponse,
+    LeaveBalanceItem,
+)
+from be.services.http_cache import cached_json_response
 
 router = APIRouter(prefix="/leave-balances", tags=["leave-balances"])
 
+_ALL_BALANCES_SQL = text(
+    """
+    SELECT employee_id, leave_type, available_units
+    FROM public.leave_balances
+    WHERE employee_id = :employee_id
+    """
+)
+_ONE_BALANCE_SQL = text(
+    """
+    SELECT employee_id, leave_type, available_units
+    FROM public.leave_balances
+    WHERE employee_id = :employee_id AND leave_type = :leave_type
+    """
+)
+_BATCH_BALANCES_STMT = select(LeaveBalances.employee_id, LeaveBalances.leave_type, LeaveBalances.available_units).where(
+    tuple_(LeaveBalances.employee_id, LeaveBalances.leave_type).in_(bindparam("keys", expanding=True))
+)
 
-@router.get("/{employee_id}", response_model=LeaveBalancesResponse)
-def get_all_balances(employee_id: str, session: Session = Depends(get_session)):
-    rows = session.exec(select(LeaveBalances).where(LeaveBalances.employee_id == employee_id)).all()
+
+@router.get("/{employee_id}", response_model=LeaveBalancesResponse, response_model_exclude_none=True)
+async def get_all_balances(employee_id: str, request: Request, conn: AsyncConnection = Depends(get_async_conn)):
+    rows = (await conn.execute(_ALL_BALANCES_SQL, {"employee_id": employee_id})).mappings().all()
     if not rows:
         # demo 里宁愿 404，避免“没数据但看起来像 0”
         raise HTTPException(status_code=404, detail="No leave balances found for this employee")
 
-    return LeaveBalancesResponse(
-        employee_id=employee_id,
-        balances=[
-            LeaveBalanceItem(employee_id=r.employee_id, leave_type=r.leave_type, available_units=r.available_units)
-            for r in rows
-        ],
+    return cached_json_response(
+        request,
+        LeaveBalancesResponse(
+            employee_id=employee_id,
+            balances=[LeaveBalanceItem.model_validate(r) for r in rows],
+        ),
     )
 
 
-@router.get("/{employee_id}/{leave_type}", response_model=LeaveBalanceItem)
-def get_one_balance(employee_id: str, leave_type: str, session: Session = Depends(get_session)):
-    row = session.exec(
-        select(LeaveBalances).where(
-            (LeaveBalances.employee_id == employee_id) & (LeaveBalances.leave_type == leave_type)
-        )
-    ).first()
+@router.get("/{employee_id}/{leave_type}", response_model=LeaveBalanceItem, response_model_exclude_none=True)
+async def get_one_balance(
+    employee_id: str,
+    leave_type: str,
+    request: Request,
+    conn: AsyncConnection = Depends(get_async_conn),
+):
+    row = (
+        await conn.execute(_ONE_BALANCE_SQL, {"employee_id": employee_id, "leave_type": leave_type})
+    ).mappings().first()
     if not row:
         # Return zero balance instead of 404 so agent workflows can continue deterministically.
-        return LeaveBalanceItem(employee_id=employee_id, leave_type=leave_type, available_units=0.0)
+        item = LeaveBalanceItem(employee_id=employee_id, leave_type=leave_type, available_units=0.0)
+    else:
+        item = LeaveBalanceItem.model_validate(row)
+    return cached_json_response(request, item)
+
 
-    return LeaveBalanceItem(employee_id=row.employee_id, leave_type=row.leave_type, available_units=row.available_units)
+@router.post("/batch", response_model=LeaveBalanceBatchResponse)
+async def get_balances_batch(req: LeaveBalanceBatchRequest, conn: AsyncConnection = Depends(get_async_conn)):
+    # One round trip for many (employee_id, leave_type) pairs; the composite PK serves the row-value IN lookup.
+    keys = list(dict.fromkeys((item.employee_id, item.leave_type) for item in req.items))
+    rows = await conn.execute(_BATCH_BALANCES_STMT, {"keys": keys})
+    found = {(emp_id, leave_type): units for emp_id, leave_type, units in rows}
+
+    # Same zero-fill contract as get_one_balance, in request order.
+    return LeaveBalanceBatchResponse(
+        balances=[
+            LeaveBalanceItem(employee_id=emp_id, leave_type=leave_type, available_units=found.get((emp_id, leave_type), 0.0))
+            for emp_id, leave_type in keys
+        ]
+    )
@@ -3,6 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlmodel import Session
 
 from be.config.db import get_session
@@ -42,9 +43,12 @@ def retrieve_policy(payload: PolicyRetrieveRequest, session: Session = Depends(g
     if not chunks:
         raise HTTPException(status_code=404, detail="No policy chunks found for policy_group")
 
-    return {
-        "policy_group": payload.policy_group,
-        "query": payload.query,
-        "top_k": payload.top_k,
-        "chunks": chunks,
-    }
+    # chunks are plain dicts built by the service; serialize them as-is instead of re-validating every chunk.
+    return ORJSONResponse(
+        {
+            "policy_group": payload.policy_group,
+            "query": payload.query,
+            "top_k": payload.top_k,
+            "chunks": chunks,
+        }
+    )
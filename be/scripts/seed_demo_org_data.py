@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import sys
 from pathlib import Path
 from datetime import datetime, timezone
@@ -16,6 +17,7 @@ for p in (str(PROJECT_ROOT), str(BE_ROOT)):
         sys.path.insert(0, p)
 
 from be.config.db import engine
+from be.services.directory_cache import flush_directory_cache
 
 
 POLICY_GROUP = "FTE_CN_GZ"
@@ -240,6 +242,10 @@ def main() -> None:
         upsert_leave_balances(session)
         session.commit()
 
+    # Employees were deleted/re-upserted; drop cached directory lookups so the API serves the new rows.
+    flushed = asyncio.run(flush_directory_cache())
+    print(f"Flushed {flushed} cached directory entries.")
+
     print("Seeded demo employees and leave_balances.")
     print("Hierarchy source: be/policies/org_hierarchy_fte_cn_gz.md")
     print("Benefit source: be/policies/employee_benefits_fte_cn_gz.md")
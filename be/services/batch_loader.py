@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Coalesces load() calls issued in the same event-loop tick into a single batch_fn(keys) call.
+
+    batch_fn returns {key: value}; keys it leaves out resolve to None. Concurrent loads of the same key
+    share one future, and a cancelled caller does not cancel the lookup for the others.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]]) -> None:
+        self._batch_fn = batch_fn
+        self._pending: Dict[K, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures are bound to their loop; a new loop (e.g. a script calling asyncio.run) starts clean.
+            self._loop, self._pending = loop, {}
+        fut = self._pending.get(key)
+        if fut is None:
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            fut = self._pending[key] = loop.create_future()
+        return await asyncio.shield(fut)
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[K, asyncio.Future]) -> None:
+        try:
+            found = await self._batch_fn(list(batch))
+        except Exception as e:
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for key, fut in batch.items():
+            if not fut.done():
+                fut.set_result(found.get(key))
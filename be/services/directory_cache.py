@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import Optional
+
+from cachetools import TTLCache
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from be.model.schemas import DirectoryResponse
+
+logger = logging.getLogger(__name__)
+
+# Cache-aside for /directory lookups in two tiers:
+# - a per-process TTL cache (short TTL, no network hop) that absorbs hot managers / repeat requesters;
+# - Redis, opt-in via REDIS_URL, shared across workers (unset = L1 misses hit the DB).
+# Bump the version prefix whenever DirectoryResponse changes shape so old entries are never decoded.
+DIRECTORY_CACHE_PREFIX = "dir:v1"
+DIRECTORY_CACHE_TTL = int(os.getenv("DIRECTORY_CACHE_TTL", "300"))
+LOCAL_CACHE_SIZE = 10_000
+LOCAL_CACHE_TTL = 60
+REDIS_URL = os.getenv("REDIS_URL")
+
+_redis: Optional[aioredis.Redis] = aioredis.from_url(REDIS_URL) if REDIS_URL else None
+_local: "TTLCache[str, DirectoryResponse]" = TTLCache(maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL)
+
+
+def directory_cache_key(field: str, value: str) -> str:
+    return f"{DIRECTORY_CACHE_PREFIX}:{field}:{value}"
+
+
+async def get_cached_directory(key: str) -> Optional[DirectoryResponse]:
+    resp = _local.get(key)
+    if resp is not None or _redis is None:
+        return resp
+    try:
+        raw = await _redis.get(key)
+    except RedisError:
+        logger.warning("directory cache read failed", exc_info=True)
+        return None
+    if not raw:
+        return None
+    resp = DirectoryResponse.model_validate_json(raw)
+    _local[key] = resp
+    return resp
+
+
+async def store_directory(key: str, resp: DirectoryResponse) -> None:
+    _local[key] = resp
+    if _redis is None:
+        return
+    try:
+        await _redis.set(key, resp.model_dump_json(), ex=DIRECTORY_CACHE_TTL)
+    except RedisError:
+        logger.warning("directory cache write failed", exc_info=True)
+
+
+async def flush_directory_cache() -> int:
+    """
+    Drop every cached directory lookup; call after bulk employee changes (e.g. the demo seed script).
+
+    Clears this process's local cache and all dir:v1:* keys in Redis, and returns how many Redis keys went.
+    API workers in other processes keep their local copies for at most LOCAL_CACHE_TTL.
+    """
+    _local.clear()
+    if _redis is None:
+        return 0
+    deleted = 0
+    try:
+        batch = []
+        async for key in _redis.scan_iter(match=f"{DIRECTORY_CACHE_PREFIX}:*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                deleted += await _redis.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await _redis.unlink(*batch)
+    except RedisError:
+        logger.warning("directory cache flush failed", exc_info=True)
+    return deleted
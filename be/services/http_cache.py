@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+
+def cached_json_response(request: Request, model: BaseModel, max_age: int = 30) -> Response:
+    """
+    Serialize `model` once and answer with a strong ETag + Cache-Control.
+
+    Returns 304 (no body) when the client's If-None-Match already names this ETag, so repeat
+    agent lookups skip both the payload transfer and client-side JSON parsing.
+    """
+    body = model.model_dump_json(exclude_none=True).encode()
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
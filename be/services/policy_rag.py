@@ -1,21 +1,70 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Deque, List, Dict, Any, Optional, Tuple
 
-from sqlalchemy import text, bindparam
+import numpy as np
+from cachetools import LRUCache, TTLCache
+from sqlalchemy import insert, text, bindparam
+from sqlalchemy.dialects.postgresql import BYTEA, insert as pg_insert
 from sqlmodel import Session
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from be.model.models import VectorType
+from be.model.models import EmbeddingCache, PolicyChunks, VectorType
 
 EMBED_MODEL = "gemini-embedding-001"
 EMBED_DIM = 3072
+_TRAIL_WS = re.compile(r"[^\S\n]+$", re.M)  # trailing spaces/tabs/CR on each line
+EMBED_CACHE_SIZE = 4096
+QUERY_EMBED_CACHE_SIZE = 1024
+QUERY_EMBED_TTL_S = 300
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_TTL_S = 300
+SEMANTIC_CACHE_SIZE = 64
+# embed_documents sends one API request per 100 texts, one after another; smaller groups in parallel overlap them.
+EMBED_BATCH_SIZE = 32
+EMBED_WORKERS = 4
+SEMANTIC_HIT_THRESHOLD = 0.97
+# pgvector's default hnsw.ef_search is 40; only override it (one extra SET LOCAL per retrieve) when configured.
+HNSW_DEFAULT_EF_SEARCH = 40
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", str(HNSW_DEFAULT_EF_SEARCH)))
+
+# Chunks are stored as halfvec (fp16, 6 KB per 3072-dim row instead of 12 KB); the query vector is cast to match.
+DISTANCE_SQL = f"embedding <=> CAST(:qvec AS halfvec({EMBED_DIM}))"
+
+
+def _content_hash(content: str) -> bytes:
+    # Model and dim are part of the key so switching EMBED_MODEL never serves stale vectors.
+    return hashlib.sha256(f"{EMBED_MODEL}:{EMBED_DIM}\n{content}".encode("utf-8")).digest()
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
 
 
 class PolicyRagService:
     def __init__(self) -> None:
         self._emb: GoogleGenerativeAIEmbeddings | None = None
+        # Embedding API calls dominate ingest/retrieve latency. Chunk vectors are cached in-process and in
+        # public.embedding_cache (keyed by content hash); query vectors only in-process with a TTL.
+        self._chunk_vecs: LRUCache[bytes, List[float]] = LRUCache(maxsize=EMBED_CACHE_SIZE)
+        self._query_vecs: TTLCache[str, List[float]] = TTLCache(maxsize=QUERY_EMBED_CACHE_SIZE, ttl=QUERY_EMBED_TTL_S)
+        # Retrieval results: exact (group, normalized query, top_k) hits skip the embed call and the vector scan;
+        # near-duplicate queries (cosine >= SEMANTIC_HIT_THRESHOLD) skip the scan. Any ingest bumps
+        # _corpus_version and drops both, and results computed against an older version are never stored.
+        self._results: TTLCache[Tuple[str, str, int], List[Dict[str, Any]]] = TTLCache(
+            maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_S
+        )
+        self._recent: Deque[Tuple[str, int, np.ndarray, List[Dict[str, Any]]]] = deque(maxlen=SEMANTIC_CACHE_SIZE)
+        self._corpus_version = 0
+        self._table_ready = False
+        # Sync routes run on the threadpool; cachetools caches are not thread-safe.
+        self._cache_lock = threading.Lock()
 
     def _get_embeddings(self) -> GoogleGenerativeAIEmbeddings:
         if self._emb is None:
@@ -27,19 +76,16 @@ class PolicyRagService:
 
     @staticmethod
     def _chunk_text(content: str, chunk_size: int = 500, overlap: int = 100) -> List[str]:
-        normalized = "\n".join(line.rstrip() for line in content.splitlines()).strip()
-        chunks: List[str] = []
-        start = 0
-        while start < len(normalized):
-            end = min(start + chunk_size, len(normalized))
-            chunks.append(normalized[start:end])
-            if end >= len(normalized):
-                break
-            start = max(end - overlap, start + 1)
-        return [c for c in chunks if c.strip()]
+        normalized = _TRAIL_WS.sub("", content).strip()
+        stride = max(chunk_size - overlap, 1)
+        # Same windows as stepping start by `stride` until a window reaches the end of the text.
+        bounds = range(0, max(len(normalized) - overlap, 1), stride)
+        return [c for c in (normalized[start : start + chunk_size] for start in bounds) if c.strip()]
 
-    @staticmethod
-    def ensure_table(session: Session) -> None:
+    def ensure_table(self, session: Session) -> None:
+        # DDL is idempotent but not free (catalog locks + a round trip per statement); run it once per process.
+        if self._table_ready:
+            return
         session.exec(text("CREATE EXTENSION IF NOT EXISTS vector;"))
         session.exec(
             text(
@@ -50,6 +96,17 @@ class PolicyRagService:
                     doc_name TEXT NOT NULL,
                     chunk_index INTEGER NOT NULL,
                     content TEXT NOT NULL,
+                    embedding HALFVEC({EMBED_DIM}) NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                );
+                """
+            )
+        )
+        session.exec(
+            text(
+                f"""
+                CREATE TABLE IF NOT EXISTS public.embedding_cache (
+                    content_hash BYTEA PRIMARY KEY,
                     embedding VECTOR({EMBED_DIM}) NOT NULL,
                     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
                 );
@@ -64,17 +121,115 @@ class PolicyRagService:
                 """
             )
         )
-        if EMBED_DIM <= 2000:
+        # Tables created before embeddings moved to halfvec: convert in place (one table rewrite).
+        # The old expression index on embedding::halfvec is dropped first and rebuilt on the column below.
+        column_type = session.execute(
+            text(
+                """
+                SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+                WHERE attrelid = 'public.policy_chunks'::regclass AND attname = 'embedding';
+                """
+            )
+        ).scalar()
+        if column_type and column_type.startswith("vector"):
+            session.exec(text("DROP INDEX IF EXISTS public.idx_policy_chunks_embedding_hnsw;"))
+            session.exec(text("DROP INDEX IF EXISTS public.idx_policy_chunks_embedding;"))
             session.exec(
                 text(
-                    """
-                    CREATE INDEX IF NOT EXISTS idx_policy_chunks_embedding
-                    ON public.policy_chunks USING ivfflat (embedding vector_cosine_ops)
-                    WITH (lists = 50);
+                    f"""
+                    ALTER TABLE public.policy_chunks
+                    ALTER COLUMN embedding TYPE HALFVEC({EMBED_DIM}) USING embedding::halfvec({EMBED_DIM});
                     """
                 )
             )
+        # vector indexes stop at 2000 dims; halfvec HNSW goes to 4000.
+        session.exec(
+            text(
+                """
+                CREATE INDEX IF NOT EXISTS idx_policy_chunks_embedding_hnsw
+                ON public.policy_chunks USING hnsw (embedding halfvec_cosine_ops)
+                WITH (m = 16, ef_construction = 64);
+                """
+            )
+        )
         session.commit()
+        self._table_ready = True
+
+    def _embed_documents(self, session: Session, chunks: List[str]) -> List[List[float]]:
+        hashes = [_content_hash(c) for c in chunks]
+        vectors: Dict[bytes, List[float]] = {}
+        with self._cache_lock:
+            for h in hashes:
+                vec = self._chunk_vecs.get(h)
+                if vec is not None:
+                    vectors[h] = vec
+
+        missing = [h for h in dict.fromkeys(hashes) if h not in vectors]
+        if missing:
+            lookup_stmt = text(
+                "SELECT content_hash, embedding FROM public.embedding_cache WHERE content_hash = ANY(:hashes)"
+            ).columns(content_hash=BYTEA, embedding=VectorType(EMBED_DIM))
+            for content_hash, vec in session.execute(lookup_stmt, {"hashes": missing}):
+                vectors[bytes(content_hash)] = vec
+
+        to_embed = {h: c for h, c in zip(hashes, chunks) if h not in vectors}
+        if to_embed:
+            fresh = dict(zip(to_embed, self._embed_uncached(list(to_embed.values()))))
+            store_stmt = pg_insert(EmbeddingCache).on_conflict_do_nothing(index_elements=["content_hash"])
+            session.execute(store_stmt, [{"content_hash": h, "embedding": v} for h, v in fresh.items()])
+            vectors.update(fresh)
+
+        with self._cache_lock:
+            for h, vec in vectors.items():
+                self._chunk_vecs[h] = vec
+        return [vectors[h] for h in hashes]
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        emb = self._get_embeddings()
+        groups = [texts[i : i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        if len(groups) == 1:
+            return emb.embed_documents(groups[0])
+        with ThreadPoolExecutor(max_workers=min(EMBED_WORKERS, len(groups))) as pool:
+            return [vec for group_vecs in pool.map(emb.embed_documents, groups) for vec in group_vecs]
+
+    def _embed_query(self, query: str) -> List[float]:
+        key = _normalize_query(query)
+        with self._cache_lock:
+            vec = self._query_vecs.get(key)
+        if vec is None:
+            vec = self._get_embeddings().embed_query(query)
+            with self._cache_lock:
+                self._query_vecs[key] = vec
+        return vec
+
+    def _semantic_lookup(self, policy_group: str, top_k: int, q_unit: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+        with self._cache_lock:
+            entries = [e for e in self._recent if e[0] == policy_group and e[1] == top_k]
+        if not entries:
+            return None
+        sims = np.stack([e[2] for e in entries]) @ q_unit
+        best = int(np.argmax(sims))
+        return entries[best][3] if sims[best] >= SEMANTIC_HIT_THRESHOLD else None
+
+    def _store_result(
+        self,
+        version: int,
+        key: Tuple[str, str, int],
+        result: List[Dict[str, Any]],
+        q_unit: Optional[np.ndarray] = None,
+    ) -> None:
+        with self._cache_lock:
+            if version != self._corpus_version:
+                return
+            self._results[key] = result
+            if q_unit is not None:
+                self._recent.append((key[0], key[2], q_unit, result))
+
+    def _invalidate_results(self) -> None:
+        with self._cache_lock:
+            self._corpus_version += 1
+            self._results.clear()
+            self._recent.clear()
 
     def ingest_markdown(self, session: Session, policy_group: str, doc_path: str) -> Dict[str, Any]:
         self.ensure_table(session)
@@ -85,33 +240,30 @@ class PolicyRagService:
 
         content = md_path.read_text(encoding="utf-8")
         chunks = self._chunk_text(content)
-        vectors = self._get_embeddings().embed_documents(chunks)
+        vectors = self._embed_documents(session, chunks)
 
         session.execute(
             text("DELETE FROM public.policy_chunks WHERE policy_group = :policy_group AND doc_name = :doc_name"),
             {"policy_group": policy_group, "doc_name": md_path.name},
         )
 
-        insert_stmt = text(
-            """
-            INSERT INTO public.policy_chunks(policy_group, doc_name, chunk_index, content, embedding)
-            VALUES (:policy_group, :doc_name, :chunk_index, :content, :embedding);
-            """
-        ).bindparams(bindparam("embedding", type_=VectorType(EMBED_DIM)))
-
-        for idx, (chunk, vec) in enumerate(zip(chunks, vectors)):
-            session.execute(
-                insert_stmt,
-                {
-                    "policy_group": policy_group,
-                    "doc_name": md_path.name,
-                    "chunk_index": idx,
-                    "content": chunk,
-                    "embedding": vec,
-                },
-            )
+        # Core insert() with a list of rows is sent as batched multi-row VALUES (insertmanyvalues),
+        # not one round trip per chunk.
+        rows = [
+            {
+                "policy_group": policy_group,
+                "doc_name": md_path.name,
+                "chunk_index": idx,
+                "content": chunk,
+                "embedding": vec,
+            }
+            for idx, (chunk, vec) in enumerate(zip(chunks, vectors))
+        ]
+        if rows:
+            session.execute(insert(PolicyChunks), rows)
 
         session.commit()
+        self._invalidate_results()
         return {
             "policy_group": policy_group,
             "doc_name": md_path.name,
@@ -119,31 +271,47 @@ class PolicyRagService:
         }
 
     def retrieve(self, session: Session, policy_group: str, query: str, top_k: int = 4) -> List[Dict[str, Any]]:
+        key = (policy_group, _normalize_query(query), top_k)
+        with self._cache_lock:
+            version = self._corpus_version
+            cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
         self.ensure_table(session)
 
-        q_vec = self._get_embeddings().embed_query(query)
+        q_vec = self._embed_query(query)
+        q_arr = np.asarray(q_vec, dtype=np.float32)
+        q_unit = q_arr / (float(np.linalg.norm(q_arr)) or 1.0)
+        similar = self._semantic_lookup(policy_group, top_k, q_unit)
+        if similar is not None:
+            self._store_result(version, key, similar)
+            return similar
 
         retrieve_stmt = text(
-            """
+            f"""
             SELECT
                 chunk_id,
                 doc_name,
                 chunk_index,
                 content,
-                1 - (embedding <=> :qvec) AS score
+                1 - ({DISTANCE_SQL}) AS score
             FROM public.policy_chunks
             WHERE policy_group = :policy_group
-            ORDER BY embedding <=> :qvec
+            ORDER BY {DISTANCE_SQL}
             LIMIT :top_k;
             """
         ).bindparams(bindparam("qvec", type_=VectorType(EMBED_DIM)))
 
+        if HNSW_EF_SEARCH != HNSW_DEFAULT_EF_SEARCH:
+            session.execute(text(f"SET LOCAL hnsw.ef_search = {HNSW_EF_SEARCH}"))
+
         rows = session.execute(
             retrieve_stmt,
             {"policy_group": policy_group, "qvec": q_vec, "top_k": top_k},
         ).all()
 
-        return [
+        result = [
             {
                 "chunk_id": r[0],
                 "doc_name": r[1],
@@ -153,6 +321,9 @@ class PolicyRagService:
             }
             for r in rows
         ]
+        if result:
+            self._store_result(version, key, result, q_unit)
+        return result
 
 
 policy_rag_service = PolicyRagService()